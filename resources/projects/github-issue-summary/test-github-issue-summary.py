@@ -6,11 +6,21 @@ Tests the core logic locally before deploying to AWS Lambda.
 Stores snapshots in local JSON file instead of DynamoDB.
 """
 
+import ijson
 import json
-import requests
-from datetime import datetime
+import os
+import re
+import threading
+import time
+import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from zoneinfo import ZoneInfo
 import boto3
+from botocore.config import Config
+from cachetools import TTLCache, cached
 from typing import List, Dict, Optional
 
 # Configuration
@@ -18,124 +28,405 @@ GITHUB_REPO_OWNER = "ChinchillaEnterprises"
 GITHUB_REPO_NAME = "transportation-insight"
 SLACK_CHANNEL_ID = "C07JM1KJJ6L"  # Git and Slack channel
 SNAPSHOT_FILE = "github-issue-snapshot.json"  # Local storage instead of DynamoDB
-
-# AWS Secrets Manager client
-secrets_client = boto3.client('secretsmanager', region_name='us-east-1')
-
+CST = ZoneInfo('America/Chicago')  # Report timestamps
+USE_GRAPHQL = True  # GraphQL fetches only the needed fields; REST supports ETag revalidation
+FULL_REFETCH_DAYS = 7  # Incremental runs can't see deleted/transferred issues, so resync this often
+
+CATEGORIES = ('readyForTesting', 'inProgress', 'blocked', 'backlog')
+SNAPSHOT_SCHEMA_VERSION = 2  # 2: each category is {'numbers': [...], 'items': [...]}
+
+# Status label patterns (status:blocked, ready-for-testing, In Progress, etc.)
+# The ready branch only looks ahead, so a 'blocked' between the two words still matches
+LABEL_RE = re.compile(
+    r'(?P<blk>(?<!un)blocked)|(?P<rdy>ready(?=.*test)|test(?=.*ready))|(?P<ip>in[-_ ]progress)',
+    re.IGNORECASE
+)
+
+# Fingerprint of the label classification, stored in each snapshot so results
+# memoized under an older classifier are never reused. Bump CLASSIFIER_VERSION
+# when the bucket priority logic in Categorizer.feed changes; edits to
+# LABEL_RE change the fingerprint on their own.
+CLASSIFIER_VERSION = 1
+CLASSIFIER = f"{CLASSIFIER_VERSION}:{LABEL_RE.pattern}"
+
+# AWS Secrets Manager client (fail fast rather than hang on a slow endpoint)
+secrets_client = boto3.client(
+    'secretsmanager',
+    region_name='us-east-1',
+    config=Config(retries={'max_attempts': 3, 'mode': 'standard'}, connect_timeout=2, read_timeout=5)
+)
+
+# Secrets cached per process for an hour, so warm runs skip Secrets Manager
+# but rotated secrets are still picked up
+@cached(TTLCache(maxsize=8, ttl=3600), lock=threading.Lock())
 def get_secret(secret_name: str) -> dict:
     """Fetch secret from AWS Secrets Manager"""
     response = secrets_client.get_secret_value(SecretId=secret_name)
     return json.loads(response['SecretString'])
 
-def fetch_github_issues(owner: str, repo: str, token: str) -> List[dict]:
-    """Fetch all open issues from GitHub API"""
-    url = f"https://api.github.com/repos/{owner}/{repo}/issues"
-    params = {
-        'state': 'open',
-        'per_page': 100
-    }
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/vnd.github+json',
-        'X-GitHub-Api-Version': '2022-11-28',
-        'User-Agent': 'ChillTask-IssueSummary/1.0'
+# Shared HTTP/2 client for GitHub and Slack - one multiplexed connection per host.
+# The transport retries connection failures; github_request retries transient statuses.
+client = httpx.Client(
+    timeout=10.0,
+    headers={'User-Agent': 'ChillTask-IssueSummary/1.0'},
+    transport=httpx.HTTPTransport(http2=True, retries=3)
+)
+
+GITHUB_HEADERS = {
+    'Accept': 'application/vnd.github+json',
+    'X-GitHub-Api-Version': '2022-11-28'
+}
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 5
+MAX_RETRY_DELAY = 60  # Seconds - give up rather than sit out a long rate-limit window
+
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $cursor: String, $states: [IssueState!], $since: DateTime) {
+  repository(owner: $owner, name: $name) {
+    issues(first: 100, after: $cursor, states: $states, filterBy: {since: $since}) {
+      nodes {
+        number title url state
+        labels(first: 100) { nodes { name } pageInfo { endCursor hasNextPage } }
+      }
+      pageInfo { endCursor hasNextPage }
     }
+  }
+}
+"""
 
-    print(f"📡 Fetching issues from {owner}/{repo}...")
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
+# Follow-up for the rare issue with more labels than ISSUES_QUERY returns
+ISSUE_LABELS_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    issue(number: $number) {
+      labels(first: 100, after: $cursor) { nodes { name } pageInfo { endCursor hasNextPage } }
+    }
+  }
+}
+"""
 
-    issues = response.json()
+def is_rate_limited(response: httpx.Response) -> bool:
+    """GitHub signals primary and secondary rate limits with a 403 as well as 429"""
+    return response.status_code == 403 and (
+        'Retry-After' in response.headers or response.headers.get('X-RateLimit-Remaining') == '0'
+    )
 
-    # Filter out pull requests (they appear in issues API)
-    actual_issues = [issue for issue in issues if 'pull_request' not in issue]
+def retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying - exponential backoff, or longer if GitHub says so"""
+    delay = 0.5 * 2 ** attempt
+    try:
+        delay = max(delay, float(response.headers.get('Retry-After', 0)))
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            delay = max(delay, float(response.headers.get('X-RateLimit-Reset', 0)) - time.time())
+    except ValueError:
+        pass  # HTTP-date Retry-After or malformed header - keep the backoff
+    return delay
+
+def github_request(method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+    """Request on the shared client, retrying transient statuses and rate limits"""
+    # Streamed responses must be closed by the caller
+    request = client.build_request(method, url, **kwargs)
+    for attempt in range(MAX_RETRIES):
+        response = client.send(request, stream=stream)
+        if response.status_code not in RETRY_STATUSES and not is_rate_limited(response):
+            return response
+        response.close()
+        delay = retry_delay(response, attempt)
+        if delay > MAX_RETRY_DELAY:
+            raise RuntimeError(f"GitHub asked to wait {delay:.0f}s (HTTP {response.status_code}) - giving up")
+        time.sleep(delay)
+
+    return client.send(request, stream=stream)
+
+def github_graphql(query: str, variables: dict, headers: dict) -> dict:
+    """Run a GraphQL query and return its repository field, raising on GraphQL errors"""
+    response = github_request('POST', GITHUB_GRAPHQL_URL, headers=headers,
+                              json={'query': query, 'variables': variables})
+    response.raise_for_status()
+    body = orjson.loads(response.content)
+    if body.get('errors'):
+        raise RuntimeError(f"GitHub GraphQL error: {body['errors'][0].get('message')}")
+    return body['data']['repository']
+
+class Categorizer:
+    """Categorize issues by label, one issue at a time as they stream in"""
+
+    def __init__(self, previous: Optional[dict] = None, incremental: bool = False):
+        # issue number -> (bucket, item); backlog issues keep no item
+        self.categorized = {}
+        # str(issue number) -> sorted label names, persisted for the next run's memo
+        self.labels = {}
+        self.fed = 0
+
+        # Memoized results from a different classifier would be stale
+        if previous and previous.get('classifier') == CLASSIFIER:
+            self.prev_labels = previous.get('labels', {})
+        else:
+            self.prev_labels = {}
+        self.prev_bucket = {}
+        # Incremental runs start from the previous buckets; fed issues replace their entries
+        if previous:
+            for bucket in CATEGORIES:
+                numbers = previous[bucket]['numbers']
+                for number, item in zip(numbers, previous[bucket].get('items') or [None] * len(numbers)):
+                    self.prev_bucket[number] = bucket
+                    if incremental:
+                        self.categorized[number] = (bucket, item)
+            if incremental:
+                self.labels = dict(self.prev_labels)
+
+    def feed(self, issue: dict):
+        """Apply one issue from the GitHub API"""
+        # Pull requests appear in the issues API too
+        if 'pull_request' in issue:
+            return
+
+        self.fed += 1
+        number = issue['number']
+        key = str(number)
+        self.categorized.pop(number, None)
+        self.labels.pop(key, None)
+        if issue.get('state', 'open') != 'open':
+            return
+
+        label_names = sorted(label['name'] for label in issue['labels'])
+        self.labels[key] = label_names
+
+        # Same labels as last run - same bucket, skip the pattern matching
+        if self.prev_labels.get(key) == label_names:
+            bucket = self.prev_bucket.get(number)
+        else:
+            bucket = None
+
+        if bucket is None:
+            matched = set()
+            for name in label_names:
+                matched.update(m.lastgroup for m in LABEL_RE.finditer(name))
+
+            # Prioritize: blocked > ready-for-testing > in-progress > backlog
+            if 'blk' in matched:
+                bucket = 'blocked'
+            elif 'rdy' in matched:
+                bucket = 'readyForTesting'
+            elif 'ip' in matched:
+                bucket = 'inProgress'
+            else:
+                bucket = 'backlog'
+
+        # The Slack message never lists backlog issues, only counts them
+        if bucket == 'backlog':
+            self.categorized[number] = (bucket, None)
+        else:
+            self.categorized[number] = (bucket, {
+                'number': number,
+                'title': issue['title'],
+                'url': issue['html_url']
+            })
+
+    def snapshot(self) -> dict:
+        """Build the snapshot for everything fed so far"""
+        # Parallel numbers/items arrays per category
+        buckets = {bucket: {'numbers': [], 'items': []} for bucket in CATEGORIES}
+        for number, (bucket, item) in self.categorized.items():
+            buckets[bucket]['numbers'].append(number)
+            buckets[bucket]['items'].append(item)
+
+        del buckets['backlog']['items']
+
+        ready_for_testing = buckets['readyForTesting']['numbers']
+        in_progress = buckets['inProgress']['numbers']
+        blocked = buckets['blocked']['numbers']
+        backlog = buckets['backlog']['numbers']
+
+        snapshot = {
+            'schemaVersion': SNAPSHOT_SCHEMA_VERSION,
+            **buckets,
+            'readyForTestingCount': len(ready_for_testing),
+            'inProgressCount': len(in_progress),
+            'blockedCount': len(blocked),
+            'backlogCount': len(backlog),
+            'totalCount': len(self.categorized),
+            'classifier': CLASSIFIER,
+            'labels': self.labels
+        }
 
-    print(f"✅ Found {len(actual_issues)} open issues (filtered out PRs)")
-    return actual_issues
+        print(f"\n📊 Issue Categories:")
+        print(f"  ✅ Ready for Testing: {len(ready_for_testing)}")
+        print(f"  🔨 In Progress: {len(in_progress)}")
+        print(f"  🚧 Blocked: {len(blocked)}")
+        print(f"  📋 Backlog: {len(backlog)}")
+        print(f"  📈 Total: {len(self.categorized)}")
 
-def categorize_issues(issues: List[dict]) -> dict:
-    """Categorize issues by label"""
-    ready_for_testing = []
-    in_progress = []
-    blocked = []
-    backlog = []
+        return snapshot
 
-    for issue in issues:
-        label_names = [label['name'].lower() for label in issue['labels']]
+def fetch_github_issues(owner: str, repo: str, token: str, categorizer: Categorizer,
+                        previous_etags: Optional[List[str]] = None,
+                        since: Optional[str] = None) -> Optional[List[str]]:
+    """Stream all open issues from GitHub API into categorizer, returning page ETags (None on 304)"""
+    url = f"https://api.github.com/repos/{owner}/{repo}/issues"
+    params = {
+        'state': 'open',
+        'per_page': 100
+    }
+    headers = {**GITHUB_HEADERS, 'Authorization': f'Bearer {token}'}
 
-        category = {
-            'number': issue['number'],
-            'title': issue['title'],
-            'url': issue['html_url']
-        }
+    print(f"📡 Fetching issues from {owner}/{repo}...")
 
-        # Prioritize: blocked > ready-for-testing > in-progress > backlog
-        # Check for various label formats (status:blocked, blocked, etc.)
-        has_blocked = any(label for label in label_names if 'blocked' in label and not 'unblocked' in label)
-        has_ready = any(label for label in label_names if 'ready' in label and 'test' in label)
-        has_in_progress = any(label for label in label_names if 'in-progress' in label or 'in progress' in label or 'status:in-progress' in label)
-
-        if has_blocked:
-            blocked.append(category)
-        elif has_ready:
-            ready_for_testing.append(category)
-        elif has_in_progress:
-            in_progress.append(category)
+    if previous_etags:
+        # Revalidate the cached open listing first, incremental or not - if every
+        # page is a 304 there is nothing to fetch. 304s don't count against the rate limit.
+        for page, etag in enumerate(previous_etags, start=1):
+            response = github_request('GET', url, params={**params, 'page': page},
+                                      headers={**headers, 'If-None-Match': etag})
+            if response.status_code != 304:
+                # Any page miss falls through to a full refetch
+                break
         else:
-            backlog.append(category)
-
-    snapshot = {
-        'readyForTesting': ready_for_testing,
-        'inProgress': in_progress,
-        'blocked': blocked,
-        'backlog': backlog,
-        'readyForTestingCount': len(ready_for_testing),
-        'inProgressCount': len(in_progress),
-        'blockedCount': len(blocked),
-        'backlogCount': len(backlog),
-        'totalCount': len(issues)
+            print("✅ Issues unchanged since last snapshot (304 Not Modified)")
+            return None
+
+    if since:
+        # Incremental fetch - closed issues are needed to drop them from buckets
+        params.update({'state': 'all', 'since': since})
+        print(f"   Only issues updated since {since}")
+
+    etags = []
+    while url:
+        response = github_request('GET', url, stream=True, params=params, headers=headers)
+        try:
+            response.raise_for_status()
+
+            # Push decoded chunks through ijson and feed issues as they complete
+            parsed = ijson.sendable_list()
+            parser = ijson.items_coro(parsed, 'item')
+            for chunk in response.iter_bytes():
+                parser.send(chunk)
+                for issue in parsed:
+                    categorizer.feed(issue)
+                del parsed[:]
+            parser.close()
+            for issue in parsed:
+                categorizer.feed(issue)
+
+            etags.append(response.headers.get('ETag'))
+
+            # Link URLs already carry the query string
+            url = response.links.get('next', {}).get('url')
+            params = None
+        finally:
+            response.close()
+
+    if since:
+        print(f"✅ Found {categorizer.fed} updated issues (filtered out PRs)")
+        # The cached ETags no longer match the listing and only a full fetch can
+        # refresh them, so they are dropped until the next one
+        return []
+
+    print(f"✅ Found {categorizer.fed} open issues (filtered out PRs)")
+
+    # Only keep ETags if every page returned one
+    return etags if all(etags) else []
+
+def fetch_github_issues_graphql(owner: str, repo: str, token: str, categorizer: Categorizer,
+                                since: Optional[str] = None) -> List[str]:
+    """Fetch all open issues via the GitHub GraphQL API into categorizer (no ETags, so returns [])"""
+    headers = {**GITHUB_HEADERS, 'Authorization': f'Bearer {token}'}
+    variables = {
+        'owner': owner,
+        'name': repo,
+        'cursor': None,
+        'states': ['OPEN', 'CLOSED'] if since else ['OPEN'],
+        'since': since
     }
 
-    print(f"\n📊 Issue Categories:")
-    print(f"  ✅ Ready for Testing: {len(ready_for_testing)}")
-    print(f"  🔨 In Progress: {len(in_progress)}")
-    print(f"  🚧 Blocked: {len(blocked)}")
-    print(f"  📋 Backlog: {len(backlog)}")
-    print(f"  📈 Total: {len(issues)}")
-
-    return snapshot
+    print(f"📡 Fetching issues from {owner}/{repo} (GraphQL)...")
+    if since:
+        print(f"   Only issues updated since {since}")
+
+    while True:
+        issues = github_graphql(ISSUES_QUERY, variables, headers)['issues']
+        for node in issues['nodes']:
+            # A 'blocked' label past the first page must still count
+            labels = node['labels']['nodes']
+            page_info = node['labels']['pageInfo']
+            while page_info['hasNextPage']:
+                page = github_graphql(ISSUE_LABELS_QUERY, {
+                    'owner': owner,
+                    'name': repo,
+                    'number': node['number'],
+                    'cursor': page_info['endCursor']
+                }, headers)['issue']['labels']
+                labels += page['nodes']
+                page_info = page['pageInfo']
+
+            # Same shape the REST API returns, so Categorizer handles both
+            categorizer.feed({
+                'number': node['number'],
+                'title': node['title'],
+                'html_url': node['url'],
+                'state': node['state'].lower(),
+                'labels': labels
+            })
+
+        if not issues['pageInfo']['hasNextPage']:
+            break
+        variables['cursor'] = issues['pageInfo']['endCursor']
+
+    print(f"✅ Found {categorizer.fed} {'updated' if since else 'open'} issues")
+    return []
 
 def load_previous_snapshot() -> Optional[dict]:
     """Load previous snapshot from local JSON file"""
-    snapshot_path = Path(SNAPSHOT_FILE)
-
-    if not snapshot_path.exists():
+    # Just try the open - an exists() check first is an extra stat and a race
+    try:
+        with open(SNAPSHOT_FILE, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
         print(f"\n⚠️  No previous snapshot found at {SNAPSHOT_FILE}")
         print("   This is the first run - all issues will be marked as NEW")
         return None
 
-    with open(snapshot_path, 'r') as f:
-        snapshot = json.load(f)
+    snapshot = orjson.loads(data)
 
     print(f"\n📂 Loaded previous snapshot from {SNAPSHOT_FILE}")
     print(f"   Timestamp: {snapshot.get('timestamp', 'unknown')}")
+    return upgrade_snapshot(snapshot)
+
+def upgrade_snapshot(snapshot: dict) -> dict:
+    """Convert an older snapshot layout to the current schema version"""
+    if snapshot.get('schemaVersion', 1) < 2:
+        # v1 stored each category as a flat list of issue dicts
+        for bucket in CATEGORIES:
+            items = snapshot[bucket]
+            snapshot[bucket] = {'numbers': [i['number'] for i in items], 'items': items}
+        del snapshot['backlog']['items']
+        snapshot['schemaVersion'] = 2
+        print(f"   Upgraded snapshot to schema version 2")
+
     return snapshot
 
-def save_snapshot(snapshot: dict):
+def utc_timestamp() -> str:
+    """Current UTC time in the ISO-8601 form GitHub's `since` parameter expects"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def save_snapshot(snapshot: dict, etags: Optional[List[str]] = None, timestamp: Optional[str] = None):
     """Save current snapshot to local JSON file (replaces old one)"""
-    snapshot['timestamp'] = datetime.now().isoformat()
+    snapshot['timestamp'] = timestamp or utc_timestamp()
     snapshot['repoName'] = f"{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}"
+    snapshot['etags'] = etags or []
 
-    # Delete old snapshot if it exists (mimic Lambda behavior)
-    if Path(SNAPSHOT_FILE).exists():
-        print(f"\n🗑️  Deleting old snapshot before saving new one")
-
-    # Save new snapshot (overwrites old file)
-    with open(SNAPSHOT_FILE, 'w') as f:
-        json.dump(snapshot, f, indent=2)
+    # Write to a temp file and swap it in, so a crash never leaves a truncated snapshot
+    tmp_file = SNAPSHOT_FILE + '.tmp'
+    Path(tmp_file).write_bytes(orjson.dumps(snapshot, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, SNAPSHOT_FILE)
 
     print(f"💾 Saved new snapshot to {SNAPSHOT_FILE}")
 
+def bucket_map(snapshot: dict) -> Dict[int, str]:
+    """Map each issue number in a snapshot to the category it was in"""
+    return {number: bucket for bucket in CATEGORIES for number in snapshot[bucket]['numbers']}
+
 def calculate_delta(current: dict, previous: Optional[dict]) -> dict:
     """Calculate what changed between snapshots"""
 
@@ -145,18 +436,18 @@ def calculate_delta(current: dict, previous: Optional[dict]) -> dict:
             'readyForTesting': {
                 'count': current['readyForTestingCount'],
                 'delta': current['readyForTestingCount'],
-                'new': current['readyForTesting'],
+                'new': current['readyForTesting']['items'],
                 'moved': []
             },
             'inProgress': {
                 'count': current['inProgressCount'],
                 'delta': current['inProgressCount'],
-                'new': current['inProgress']
+                'new': current['inProgress']['items']
             },
             'blocked': {
                 'count': current['blockedCount'],
                 'delta': current['blockedCount'],
-                'new': current['blocked']
+                'new': current['blocked']['items']
             },
             'backlog': {
                 'count': current['backlogCount'],
@@ -164,31 +455,21 @@ def calculate_delta(current: dict, previous: Optional[dict]) -> dict:
             }
         }
 
+    # Single pass over the previous snapshot: issue number -> category
+    prev_bucket = bucket_map(previous)
+
     # Find new issues in ready-for-testing
-    prev_ready_ids = {i['number'] for i in previous['readyForTesting']}
-    new_ready = [i for i in current['readyForTesting'] if i['number'] not in prev_ready_ids]
+    new_ready = [i for i in current['readyForTesting']['items'] if prev_bucket.get(i['number']) != 'readyForTesting']
 
     # Find issues that moved TO ready-for-testing from other categories
-    prev_in_progress_ids = {i['number'] for i in previous['inProgress']}
-    prev_blocked_ids = {i['number'] for i in previous['blocked']}
-    prev_backlog_ids = {i['number'] for i in previous['backlog']}
-
     moved_to_ready = [
-        i for i in current['readyForTesting']
-        if i['number'] in prev_in_progress_ids or
-           i['number'] in prev_blocked_ids or
-           i['number'] in prev_backlog_ids
+        i for i in current['readyForTesting']['items']
+        if prev_bucket.get(i['number']) not in (None, 'readyForTesting')
     ]
 
     # Find new issues in other categories
-    prev_all_ids = {
-        i['number']
-        for i in (previous['readyForTesting'] + previous['inProgress'] +
-                  previous['blocked'] + previous['backlog'])
-    }
-
-    new_in_progress = [i for i in current['inProgress'] if i['number'] not in prev_all_ids]
-    new_blocked = [i for i in current['blocked'] if i['number'] not in prev_all_ids]
+    new_in_progress = [i for i in current['inProgress']['items'] if i['number'] not in prev_bucket]
+    new_blocked = [i for i in current['blocked']['items'] if i['number'] not in prev_bucket]
 
     delta = {
         'readyForTesting': {
@@ -223,33 +504,21 @@ def format_delta(delta_num: int) -> str:
         return str(delta_num)
     return "no change"
 
-def format_slack_message(repo: str, delta: dict) -> str:
-    """Format Slack message with aggregated issue summary"""
-    lines = []
-
-    # Header
-    from datetime import datetime
-    import pytz
-    cst = pytz.timezone('America/Chicago')
-    now_cst = datetime.now(cst)
-    time_str = now_cst.strftime('%I:%M %p %Z')
+def format_slack_message(repo: str, delta: dict, delta_strs: Dict[str, str]) -> str:
+    """Format Slack message with aggregated issue summary
 
-    lines.append(f"📊 *{repo}* - Issue Status Report")
-    lines.append(f"_{time_str}_\n")
+    delta_strs holds the already-formatted delta for each category.
+    """
+    time_str = datetime.now(CST).strftime('%I:%M %p %Z')
+    d = delta
 
-    # Ready for Testing
-    lines.append(f"✅ *Ready for Testing:* {delta['readyForTesting']['count']} issues ({format_delta(delta['readyForTesting']['delta'])})")
+    return f"""📊 *{repo}* - Issue Status Report
+_{time_str}_
 
-    # In Progress
-    lines.append(f"🔨 *In Progress:* {delta['inProgress']['count']} issues ({format_delta(delta['inProgress']['delta'])})")
-
-    # Blocked
-    lines.append(f"🚧 *Blocked:* {delta['blocked']['count']} issues ({format_delta(delta['blocked']['delta'])})")
-
-    # Backlog
-    lines.append(f"📋 *Backlog:* {delta['backlog']['count']} issues ({format_delta(delta['backlog']['delta'])})")
-
-    return '\n'.join(lines)
+✅ *Ready for Testing:* {d['readyForTesting']['count']} issues ({delta_strs['readyForTesting']})
+🔨 *In Progress:* {d['inProgress']['count']} issues ({delta_strs['inProgress']})
+🚧 *Blocked:* {d['blocked']['count']} issues ({delta_strs['blocked']})
+📋 *Backlog:* {d['backlog']['count']} issues ({delta_strs['backlog']})"""
 
 def send_slack_message(token: str, channel: str, message: str, dry_run: bool = False):
     """Send message to Slack (or just print if dry_run)"""
@@ -275,14 +544,16 @@ def send_slack_message(token: str, channel: str, message: str, dry_run: bool = F
         'mrkdwn': True
     }
 
-    response = requests.post(url, headers=headers, json=payload)
-    result = response.json()
+    response = client.post(url, headers=headers, json=payload)
+    response.raise_for_status()
+    result = orjson.loads(response.content)
+
+    # Raise so main keeps the old snapshot and the next run reports these changes again
+    if not result.get('ok'):
+        raise RuntimeError(f"Failed to send message: {result.get('error')}")
 
-    if result.get('ok'):
-        print(f"✅ Message sent successfully!")
-        print(f"   Message ID: {result.get('ts')}")
-    else:
-        print(f"❌ Failed to send message: {result.get('error')}")
+    print(f"✅ Message sent successfully!")
+    print(f"   Message ID: {result.get('ts')}")
 
 def main(dry_run: bool = True):
     """Main execution"""
@@ -291,45 +562,96 @@ def main(dry_run: bool = True):
     print("="*80)
 
     try:
-        # Step 1: Fetch secrets
-        print("\n[Step 1/6] Fetching secrets from AWS Secrets Manager...")
-        github_secret = get_secret('github-token')
-        github_token = github_secret['GITHUB_TOKEN']
-        print("✅ GitHub token loaded")
-
-        slack_secret = get_secret('chinchilla-ai-academy/slack')
-        slack_token = slack_secret['SLACK_BOT_TOKEN']
-        print("✅ Slack token loaded")
-
-        # Step 2: Fetch GitHub issues
-        print(f"\n[Step 2/6] Fetching issues from GitHub...")
-        issues = fetch_github_issues(GITHUB_REPO_OWNER, GITHUB_REPO_NAME, github_token)
-
-        # Step 3: Categorize issues
-        print(f"\n[Step 3/6] Categorizing issues by label...")
-        current_snapshot = categorize_issues(issues)
-
-        # Step 4: Load previous snapshot
-        print(f"\n[Step 4/6] Loading previous snapshot...")
-        previous_snapshot = load_previous_snapshot()
-
-        # Step 5: Calculate delta
-        print(f"\n[Step 5/6] Calculating delta...")
-        delta = calculate_delta(current_snapshot, previous_snapshot)
-
-        print("\n📈 Changes detected:")
-        print(f"  Ready for Testing: {format_delta(delta['readyForTesting']['delta'])} ({delta['readyForTesting']['count']} total)")
-        print(f"  In Progress: {format_delta(delta['inProgress']['delta'])} ({delta['inProgress']['count']} total)")
-        print(f"  Blocked: {format_delta(delta['blocked']['delta'])} ({delta['blocked']['count']} total)")
-        print(f"  Backlog: {format_delta(delta['backlog']['delta'])} ({delta['backlog']['count']} total)")
-
-        # Step 6: Format and send Slack message
-        print(f"\n[Step 6/6] Formatting Slack message...")
-        message = format_slack_message(GITHUB_REPO_NAME, delta)
-        send_slack_message(slack_token, SLACK_CHANNEL_ID, message, dry_run=dry_run)
-
-        # Save snapshot
-        save_snapshot(current_snapshot)
+        # Secrets, the snapshot load and the GitHub fetch are independent
+        # network/disk waits - overlap them wherever the data flow allows
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # Steps 1 & 2: Fetch secrets and load previous snapshot concurrently
+            print("\n[Step 1/6] Fetching secrets from AWS Secrets Manager...")
+            github_secret_future = executor.submit(get_secret, 'github-token')
+            slack_secret_future = executor.submit(get_secret, 'chinchilla-ai-academy/slack')
+
+            print(f"\n[Step 2/6] Loading previous snapshot...")
+            previous_snapshot_future = executor.submit(load_previous_snapshot)
+
+            github_token = github_secret_future.result()['GITHUB_TOKEN']
+            print("✅ GitHub token loaded")
+
+            previous_snapshot = previous_snapshot_future.result()
+            previous_etags = previous_snapshot.get('etags') if previous_snapshot else None
+
+            # Older snapshots stored naive local time, which can't be used for `since`
+            since = previous_snapshot.get('timestamp') if previous_snapshot else None
+            if since and not since.endswith('Z'):
+                since = None
+
+            # Issues that are deleted, transferred or converted never show up in a
+            # `since` query, so resync with a full fetch once the last one is too old
+            resync_cutoff = (datetime.now(timezone.utc) - timedelta(days=FULL_REFETCH_DAYS)).strftime('%Y-%m-%dT%H:%M:%SZ')
+            if since and previous_snapshot.get('fullFetchAt', '') < resync_cutoff:
+                print(f"   Last full fetch is over {FULL_REFETCH_DAYS} days old - doing a full refetch")
+                since = None
+
+            # Buckets from a different label classifier are stale - an incremental
+            # merge or a 304 reuse would carry them forward, so refetch everything
+            if previous_snapshot and previous_snapshot.get('classifier') != CLASSIFIER:
+                print("   Label classifier changed since last snapshot - doing a full refetch")
+                since = None
+                previous_etags = None
+
+            # Step 3: Fetch GitHub issues while the Slack secret is still in flight.
+            # Incremental from the previous snapshot's timestamp when it has one;
+            # otherwise a full fetch. REST revalidates the previous ETags first either way.
+            # Issues are categorized as they arrive.
+            print(f"\n[Step 3/6] Fetching issues from GitHub...")
+            categorizer = Categorizer(previous_snapshot, incremental=bool(since))
+            fetch_started = utc_timestamp()
+            if USE_GRAPHQL:
+                fetch_future = executor.submit(fetch_github_issues_graphql, GITHUB_REPO_OWNER, GITHUB_REPO_NAME,
+                                               github_token, categorizer, since)
+            else:
+                fetch_future = executor.submit(fetch_github_issues, GITHUB_REPO_OWNER, GITHUB_REPO_NAME,
+                                               github_token, categorizer, previous_etags, since)
+
+            slack_token = slack_secret_future.result()['SLACK_BOT_TOKEN']
+            print("✅ Slack token loaded")
+
+            etags = fetch_future.result()
+
+            # Step 4: Categorize issues
+            print(f"\n[Step 4/6] Categorizing issues by label...")
+            if etags is None:
+                # Nothing changed upstream - reuse the previous categorization verbatim
+                current_snapshot = dict(previous_snapshot)
+                etags = previous_etags
+                print("   Reusing previous snapshot categories")
+                # ETags are dropped by the first incremental run, so a 304 means
+                # the snapshot still matches the full listing
+                current_snapshot['fullFetchAt'] = fetch_started
+            else:
+                current_snapshot = categorizer.snapshot()
+                current_snapshot['fullFetchAt'] = previous_snapshot['fullFetchAt'] if since else fetch_started
+
+            # Step 5: Calculate delta
+            print(f"\n[Step 5/6] Calculating delta...")
+            delta = calculate_delta(current_snapshot, previous_snapshot)
+
+            # Formatted once, shared by the console summary and the Slack message
+            delta_strs = {bucket: format_delta(delta[bucket]['delta']) for bucket in CATEGORIES}
+
+            print("\n📈 Changes detected:")
+            print(f"  Ready for Testing: {delta_strs['readyForTesting']} ({delta['readyForTesting']['count']} total)")
+            print(f"  In Progress: {delta_strs['inProgress']} ({delta['inProgress']['count']} total)")
+            print(f"  Blocked: {delta_strs['blocked']} ({delta['blocked']['count']} total)")
+            print(f"  Backlog: {delta_strs['backlog']} ({delta['backlog']['count']} total)")
+
+            # Step 6: Format and send Slack message
+            print(f"\n[Step 6/6] Formatting Slack message...")
+            message = format_slack_message(GITHUB_REPO_NAME, delta, delta_strs)
+            send_slack_message(slack_token, SLACK_CHANNEL_ID, message, dry_run=dry_run)
+
+            # Save snapshot only once the send went through - if it raised, the
+            # old snapshot stays so the next run still reports this period's changes
+            save_snapshot(current_snapshot, etags, fetch_started)
 
         print("\n✅ Test completed successfully!")
 